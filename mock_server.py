@@ -5,11 +5,42 @@ WebRTC Mock Signaling Server
 
 Simple HTTP server that handles WebRTC signaling for prototyping.
 Returns hardcoded SDP answer and mock connectivity candidates.
+
+Usage:
+  python3 mock_server.py [-v]
+
+  -v  log each signaling request (default only logs warnings and errors)
 """
 
-import json
+import email.utils
+import logging
+import logging.handlers
+import queue
+import socket
 import sys
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Prefer orjson (much faster encode/decode) when it's installed, but fall back
+# to the stdlib json module so the server still runs on a stock Python.
+try:
+    import orjson
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    import json
+
+    def json_dumps(data):
+        """Serialize data to UTF-8 JSON bytes (same contract as orjson)."""
+        return json.dumps(data).encode('utf-8')
+
+    json_loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+# Request handlers log through a queue that a background thread drains, so
+# they never block on stderr. See setup_logging().
+log = logging.getLogger('mock_server')
 
 # Hardcoded mock SDP answer. SDP (Session Description Protocol) is a
 # standard format describing what the "server" side can send/receive: codecs,
@@ -57,6 +88,46 @@ MOCK_CANDIDATES = [
     }
 ]
 
+# The mock payloads never change, so serialize them once at import time
+# instead of re-encoding them on every request.
+MOCK_ANSWER_BYTES = json_dumps(MOCK_ANSWER)
+MOCK_ANSWER_LEN = b'%d' % len(MOCK_ANSWER_BYTES)
+MOCK_CANDIDATES_BYTES = json_dumps(MOCK_CANDIDATES)
+MOCK_CANDIDATES_LEN = b'%d' % len(MOCK_CANDIDATES_BYTES)
+
+# Prebuilt template for whole JSON responses, filled in with status code,
+# reason phrase, Date line, the CORS origin line (or nothing),
+# Content-Length, any extra header lines, and body. Each response goes out in one wfile.write(), skipping the
+# send_response()/send_header() formatting and per-line writes.
+_RESPONSE_TEMPLATE = (
+    b'HTTP/1.1 %d %s\r\n'
+    b'%s'
+    b'Content-Type: application/json\r\n'
+    b'%s'
+    b'Access-Control-Allow-Methods: POST, GET, OPTIONS\r\n'
+    b'Access-Control-Allow-Headers: Content-Type\r\n'
+    b'Content-Length: %s\r\n'
+    b'%s'
+    b'\r\n'
+    b'%s'
+)
+_ORIGIN_HDR = b'Access-Control-Allow-Origin: %s\r\n'
+_CONNECTION_CLOSE_HDR = b'Connection: close\r\n'
+
+# Date header line (required from HTTP/1.1 origin servers), cached as
+# (unix_second, header_bytes) so it's only reformatted once per second
+_date_hdr_cache = (0, b'')
+
+
+def _date_header():
+    """Return the Date header line for the current second."""
+    global _date_hdr_cache
+    now = int(time.time())
+    if _date_hdr_cache[0] != now:
+        date = email.utils.formatdate(now, usegmt=True).encode('ascii')
+        _date_hdr_cache = (now, b'Date: %s\r\n' % date)
+    return _date_hdr_cache[1]
+
 
 class SignalingHandler(BaseHTTPRequestHandler):
     """
@@ -64,11 +135,23 @@ class SignalingHandler(BaseHTTPRequestHandler):
     Handles POST /offer, GET /peer-candidate, POST /peer-candidate.
     """
 
-    ALLOWED_ORIGINS = [
+    # HTTP/1.1 keeps the connection open across the offer and candidate
+    # requests. Every response must send Content-Length for this to work.
+    protocol_version = 'HTTP/1.1'
+
+    ALLOWED_ORIGINS = frozenset({
         'http://localhost:8000',
         'http://127.0.0.1:8000',
         'https://samblenny.github.io'
-    ]
+    })
+
+    # Largest POST body accepted. SDP offers are a few KB at most.
+    MAX_BODY_SIZE = 65536
+
+    # Access-Control-Allow-Origin header line, cached per connection. A new
+    # handler instance is created for each connection, so this resets when
+    # the connection closes.
+    _cors_hdr = None
 
     def _get_cors_origin(self):
         """Return the Origin header if it's in allowed list, else None."""
@@ -77,22 +160,35 @@ class SignalingHandler(BaseHTTPRequestHandler):
             return origin
         return None
 
+    def _get_cors_header(self):
+        """Return the CORS origin header line (or b'') for this connection."""
+        if self._cors_hdr is None:
+            origin = self._get_cors_origin()
+            self._cors_hdr = (
+                _ORIGIN_HDR % origin.encode('latin-1') if origin else b'')
+        return self._cors_hdr
+
     def do_OPTIONS(self):
         """Handle OPTIONS preflight requests (required for CORS)."""
-        origin = self._get_cors_origin()
-        self.send_response(200)
-        if origin:
-            self.send_header('Access-Control-Allow-Origin', origin)
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        if self._discard_body():
+            self._send_precomputed(b'', b'0')
 
     def do_POST(self):
         """Handle POST requests (SDP offer, candidates from browser)."""
         try:
+            if ('Transfer-Encoding' in self.headers
+                    or 'Content-Length' not in self.headers):
+                # Only Content-Length framed bodies are supported. Anything
+                # else would leave unread bytes on the kept-alive connection.
+                self._send_error_and_close(411, 'Length Required')
+                return
             content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length).decode('utf-8')
-            data = json.loads(body)
+            if not 0 <= content_length <= self.MAX_BODY_SIZE:
+                # Refuse without reading the body
+                self._send_error_and_close(413, 'Payload Too Large')
+                return
+            body = self.rfile.read(content_length)
+            data = json_loads(body)
 
             if self.path == '/offer':
                 self._handle_offer(data)
@@ -101,34 +197,58 @@ class SignalingHandler(BaseHTTPRequestHandler):
             else:
                 self._send_error(404, 'Not Found')
 
-        except json.JSONDecodeError as e:
-            print(f'[Server] JSON parse error: {e}', file=sys.stderr)
+        except JSONDecodeError as e:
+            log.warning('JSON parse error: %s', e)
             self._send_error(400, 'Malformed JSON')
         except Exception as e:
-            print(f'[Server] Unexpected error in do_POST: {e}',
-                  file=sys.stderr)
-            self._send_error(500, 'Internal Server Error')
+            log.error('Unexpected error in do_POST: %s', e)
+            # Request body may not have been consumed, so the connection
+            # can't safely be reused for another request
+            self._send_error_and_close(500, 'Internal Server Error')
 
     def do_GET(self):
         """Handle GET requests (fetch candidates)."""
         try:
+            if not self._discard_body():
+                return
             if self.path == '/peer-candidate':
                 self._handle_get_candidates()
             else:
                 self._send_error(404, 'Not Found')
 
         except Exception as e:
-            print(f'[Server] Unexpected error in do_GET: {e}',
-                  file=sys.stderr)
-            self._send_error(500, 'Internal Server Error')
+            log.error('Unexpected error in do_GET: %s', e)
+            self._send_error_and_close(500, 'Internal Server Error')
+
+    def _discard_body(self):
+        """
+        Read and drop any body sent with a GET or OPTIONS request, so the
+        next request on a kept-alive connection starts at the right byte.
+        Returns False (after sending an error and closing the connection)
+        if the body can't be drained safely.
+        """
+        if 'Transfer-Encoding' in self.headers:
+            self._send_error_and_close(411, 'Length Required')
+            return False
+        try:
+            content_length = int(self.headers.get('Content-Length', '0'))
+        except ValueError:
+            self._send_error_and_close(400, 'Bad Content-Length')
+            return False
+        if not 0 <= content_length <= self.MAX_BODY_SIZE:
+            self._send_error_and_close(413, 'Payload Too Large')
+            return False
+        if content_length:
+            self.rfile.read(content_length)
+        return True
 
     def _handle_offer(self, offer):
         """
         Handle SDP offer from browser.
         Log the offer (for debugging) and return hardcoded answer.
         """
-        print(f'[Server] Received SDP offer')
-        self._send_json(MOCK_ANSWER)
+        log.info('Received SDP offer')
+        self._send_precomputed(MOCK_ANSWER_BYTES, MOCK_ANSWER_LEN)
 
     def _handle_peer_candidate(self, candidate):
         """
@@ -137,71 +257,96 @@ class SignalingHandler(BaseHTTPRequestHandler):
         """
         cand_str = candidate.get('candidate', '')
         if cand_str == '':
-            print(f'[Server] Received end-of-candidates marker')
+            log.info('Received end-of-candidates marker')
         else:
-            print(f'[Server] Received connectivity candidate from browser')
-
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        origin = self._get_cors_origin()
-        if origin:
-            self.send_header('Access-Control-Allow-Origin', origin)
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Content-Length', '2')
-        self.end_headers()
-        self.wfile.write(b'{}')
+            log.info('Received connectivity candidate from browser')
+
+        self._send_precomputed(b'{}', b'2')
 
     def _handle_get_candidates(self):
         """Handle GET request for candidates."""
-        print(f'[Server] Browser fetching connectivity candidates')
-        self._send_json(MOCK_CANDIDATES)
-
-    def _send_json(self, data):
-        """Send JSON response with proper headers."""
-        body = json.dumps(data).encode('utf-8')
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        origin = self._get_cors_origin()
-        if origin:
-            self.send_header('Access-Control-Allow-Origin', origin)
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Content-Length', str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
-
-    def _send_error(self, status, message):
+        log.info('Browser fetching connectivity candidates')
+        self._send_precomputed(MOCK_CANDIDATES_BYTES, MOCK_CANDIDATES_LEN)
+
+    def _send_precomputed(self, body_bytes, body_len, status=200,
+                          extra_headers=b''):
+        """
+        Send pre-serialized JSON body (body_len is bytes Content-Length).
+        extra_headers is raw header lines, each ending in CRLF.
+        """
+        origin_hdr = self._get_cors_header()
+        reason = self.responses[status][0].encode('latin-1')
+        self.wfile.write(_RESPONSE_TEMPLATE % (
+            status, reason, _date_header(), origin_hdr, body_len,
+            extra_headers, body_bytes))
+
+    def _send_error(self, status, message, extra_headers=b''):
         """Send error response."""
         error_data = {"error": message}
-        body = json.dumps(error_data).encode('utf-8')
-        self.send_response(status)
-        self.send_header('Content-Type', 'application/json')
-        origin = self._get_cors_origin()
-        if origin:
-            self.send_header('Access-Control-Allow-Origin', origin)
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Content-Length', str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        body = json_dumps(error_data)
+        self._send_precomputed(
+            body, b'%d' % len(body), status, extra_headers)
+
+    def _send_error_and_close(self, status, message):
+        """
+        Send error response and close the connection afterwards. Use this
+        when the request body wasn't consumed, so the stream can't be
+        reused for another request.
+        """
+        self.close_connection = True
+        self._send_error(status, message, _CONNECTION_CLOSE_HDR)
 
     def log_message(self, format, *args):
         """Suppress default HTTP logging."""
         pass
 
 
+class SignalingServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that sets SO_REUSEPORT where available, so several
+    server processes can share the port. On Linux, the kernel also balances
+    incoming connections between them.
+    """
+
+    def server_bind(self):
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def setup_logging(level):
+    """
+    Send log records through a queue to a background thread that writes
+    them to stderr. Returns the started QueueListener.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('[Server] %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    log.setLevel(level)
+    log.propagate = False
+    listener.start()
+    return listener
+
+
 def main():
     """Start the mock signaling server."""
     host = '0.0.0.0'
     port = 8080
+    verbose = '-v' in sys.argv[1:]
+    listener = setup_logging(logging.INFO if verbose else logging.WARNING)
 
-    server = HTTPServer((host, port), SignalingHandler)
+    # Threaded server so a slow request (e.g. a candidate POST) doesn't hold
+    # up the browser's other signaling requests
+    server = SignalingServer((host, port), SignalingHandler)
     print(f'[Server] Starting WebRTC mock signaling server on {host}:{port}')
     print(f'[Server] Endpoints:')
     print(f'[Server]   POST /offer -> returns hardcoded answer')
     print(f'[Server]   POST /peer-candidate -> logs candidate')
     print(f'[Server]   GET /peer-candidate -> returns mock candidates')
+    if not verbose:
+        print(f'[Server] Per-request logging off (run with -v to enable)')
     print(f'[Server] Press Ctrl+C to stop')
 
     try:
@@ -209,6 +354,8 @@ def main():
     except KeyboardInterrupt:
         print(f'\n[Server] Shutting down')
         server.shutdown()
+    finally:
+        listener.stop()
 
 
 if __name__ == '__main__':
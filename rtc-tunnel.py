@@ -12,7 +12,7 @@ media (RTP/RTCP) simultaneously in a single asyncio event loop.
 Design requirements
 -------------------
 - Everything must appear as localhost to browser (Chrome secure-origin rules)
-- No Homebrew or third-party dependencies
+- No Homebrew or third-party dependencies (uvloop is used if present)
 - One user action to start (single process, no multiple terminals)
 - Low latency for RTP (VP8 video, Opus audio)
 - Fixed peers, fixed ports, no NAT traversal
@@ -39,9 +39,17 @@ Examples:
 """
 
 import asyncio
+import os
 import socket
 import sys
 
+# uvloop is an optional, faster drop-in event loop. Use it when it happens to
+# be installed, but don't require it.
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # -------------------------
 # Configuration
 # -------------------------
@@ -55,20 +63,54 @@ RTP_PORT = 5004
 # UDP data channel (inputs, control, etc.)
 DATA_PORT = 6000
 
+# TCP forwarding: bytes per read, and how much may queue in a transport's
+# write buffer before we stop and wait for it to drain
+TCP_READ_SIZE = 65536
+TCP_HIGH_WATER = 256 * 1024
+
+# On Linux, forward TCP with splice(2) so bytes stay in the kernel instead
+# of round-tripping through Python objects. Elsewhere (macOS), fall back to
+# asyncio streams.
+USE_SPLICE = hasattr(os, "splice")
+
+# UDP kernel socket buffer size (SO_RCVBUF/SO_SNDBUF). Big enough to ride
+# out a VP8 keyframe burst during a brief event loop stall. The kernel may
+# clamp this (e.g. net.core.rmem_max on Linux).
+UDP_SOCKET_BUFFER = 4 * 1024 * 1024
+
+# UDP forwarding: largest datagram we accept, and the most packets moved per
+# socket wakeup before yielding back to the event loop
+UDP_MAX_PACKET = 65535
+UDP_BATCH = 32
+
 
 # -------------------------
 # TCP forwarding
 # -------------------------
 
+def tune_tcp_socket(sock):
+    # Disable Nagle so small signaling writes go out immediately, and turn on
+    # keepalive so dead peers eventually get noticed.
+    if sock is None:
+        return
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_QUICKACK"):
+        # Linux only: ACK right away rather than waiting to piggyback
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+
 async def tcp_pipe(reader, writer):
     # Copy data from reader to writer until EOF.
     try:
         while True:
-            data = await reader.read(4096)
+            data = await reader.read(TCP_READ_SIZE)
             if not data:
                 break
             writer.write(data)
-            await writer.drain()
+            # Only yield to drain() when the peer is falling behind
+            if writer.transport.get_write_buffer_size() > TCP_HIGH_WATER:
+                await writer.drain()
     finally:
         writer.close()
         try:
@@ -81,9 +123,13 @@ async def handle_tcp_client(client_reader, client_writer, remote_addr):
     # Accept a client connection, establish connection to remote, then
     # forward bytes bidirectionally between them.
     try:
+        tune_tcp_socket(client_writer.get_extra_info("socket"))
         remote_reader, remote_writer = await asyncio.open_connection(
             remote_addr[0], remote_addr[1]
         )
+        tune_tcp_socket(remote_writer.get_extra_info("socket"))
+        remote_writer.transport.set_write_buffer_limits(high=TCP_HIGH_WATER)
+        client_writer.transport.set_write_buffer_limits(high=TCP_HIGH_WATER)
 
         await asyncio.gather(
             tcp_pipe(client_reader, remote_writer),
@@ -93,9 +139,109 @@ async def handle_tcp_client(client_reader, client_writer, remote_addr):
         client_writer.close()
 
 
+async def _wait_fd(add, remove, fd):
+    # Wait for one readiness callback on fd. add/remove are the event loop's
+    # reader or writer registration methods.
+    fut = asyncio.get_running_loop().create_future()
+    add(fd, lambda: fut.done() or fut.set_result(None))
+    try:
+        await fut
+    finally:
+        remove(fd)
+
+
+async def splice_pipe(src, dst):
+    # Move bytes from socket src to socket dst until EOF by splicing through
+    # a kernel pipe. Both sockets must be non-blocking.
+    loop = asyncio.get_running_loop()
+    src_fd = src.fileno()
+    dst_fd = dst.fileno()
+    flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+    pipe_r, pipe_w = os.pipe()
+    try:
+        while True:
+            try:
+                n = os.splice(src_fd, pipe_w, TCP_READ_SIZE, flags=flags)
+            except BlockingIOError:
+                await _wait_fd(loop.add_reader, loop.remove_reader, src_fd)
+                continue
+            if n == 0:
+                break
+            # Empty the pipe into dst before reading more
+            while n:
+                try:
+                    n -= os.splice(pipe_r, dst_fd, n, flags=flags)
+                except BlockingIOError:
+                    await _wait_fd(loop.add_writer, loop.remove_writer, dst_fd)
+        dst.shutdown(socket.SHUT_WR)
+    finally:
+        os.close(pipe_r)
+        os.close(pipe_w)
+
+
+async def handle_splice_client(client, remote_addr):
+    # Same as handle_tcp_client, but for raw sockets forwarded with splice.
+    loop = asyncio.get_running_loop()
+    remote = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    remote.setblocking(False)
+    tasks = []
+    try:
+        await loop.sock_connect(remote, remote_addr)
+        tune_tcp_socket(client)
+        tune_tcp_socket(remote)
+        tasks = [
+            asyncio.create_task(splice_pipe(client, remote)),
+            asyncio.create_task(splice_pipe(remote, client)),
+        ]
+        await asyncio.gather(*tasks)
+    except Exception:
+        pass
+    finally:
+        # If one direction failed, stop the other before closing the sockets
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        client.close()
+        remote.close()
+
+
+async def start_splice_forward(local_port, remote_host, remote_port):
+    # Linux version of start_tcp_forward using an accept loop on a raw
+    # listening socket.
+    loop = asyncio.get_running_loop()
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("127.0.0.1", local_port))
+    listener.listen()
+    listener.setblocking(False)
+
+    print(
+        f"[TCP] forwarding {listener.getsockname()} -> "
+        f"{remote_host}:{remote_port} (splice)"
+    )
+
+    # Hold references so client tasks can't be garbage collected mid-flight
+    clients = set()
+    try:
+        while True:
+            client, _ = await loop.sock_accept(listener)
+            client.setblocking(False)
+            task = asyncio.create_task(
+                handle_splice_client(client, (remote_host, remote_port))
+            )
+            clients.add(task)
+            task.add_done_callback(clients.discard)
+    finally:
+        listener.close()
+
+
 async def start_tcp_forward(local_port, remote_host, remote_port):
     # Listen on localhost:local_port and forward connections to
     # remote_host:remote_port.
+    if USE_SPLICE:
+        await start_splice_forward(local_port, remote_host, remote_port)
+        return
+
     server = await asyncio.start_server(
         lambda r, w: handle_tcp_client(r, w, (remote_host, remote_port)),
         host="127.0.0.1",
@@ -113,76 +259,146 @@ async def start_tcp_forward(local_port, remote_host, remote_port):
 # Bidirectional UDP proxy (robust for ephemeral ports)
 # -------------------------
 
+def set_udp_buffers(sock):
+    # Enlarge kernel send/receive buffers so bursts aren't dropped
+    for opt in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, opt, UDP_SOCKET_BUFFER)
+        except OSError:
+            pass
+
+
 class UDPProxy:
     # Bidirectional UDP proxy: localhost:local_port <-> remote_host:remote_port
     #
     # Packet routing rules:
-    # - From remote (remote_host:remote_port) → forward to localhost
-    # - From localhost (any source port) → forward to remote
+    # - From localhost (any source port) → forward to remote. The local
+    #   socket is bound to 127.0.0.1, so the kernel only delivers loopback
+    #   traffic and no per-packet source check is needed.
+    # - From remote (remote_host:remote_port) → forward to the return address,
+    #   which is the last localhost sender seen. It's recorded once per
+    #   wakeup, not per packet, so a reloaded page on a new ephemeral port
+    #   takes over as soon as it sends anything.
     # - All other packets (stray / scans) are dropped silently
+    #
+    # This uses raw non-blocking sockets watched with loop.add_reader rather
+    # than DatagramProtocol, so one wakeup drains every queued packet instead
+    # of paying for a protocol callback per packet.
 
     def __init__(self, local_port, remote_host, remote_port):
         self.local_port = local_port
         self.remote_host = remote_host
         self.remote_port = remote_port
         self.remote_addr = (remote_host, remote_port)
-        self.local_transport = None
-        self.remote_transport = None
+        self.local_sock = None
+        self.remote_sock = None
+        # Where packets from the server go: the last localhost sender
+        self._browser_addr = None
+        # One receive buffer per direction, reused for every packet. Each
+        # packet is sent on before the next recv, so nothing is overwritten.
+        self._local_buf = memoryview(bytearray(UDP_MAX_PACKET))
+        self._remote_buf = memoryview(bytearray(UDP_MAX_PACKET))
+        self._loop = None
+        self._stop = asyncio.Event()
 
     async def start(self):
-        loop = asyncio.get_running_loop()
+        self._loop = asyncio.get_running_loop()
 
         # Local socket (receives from browser)
-        local_transport, local_proto = (
-            await loop.create_datagram_endpoint(
-                lambda: LocalUDPProtocol(self),
-                local_addr=("127.0.0.1", self.local_port),
-            )
-        )
-        self.local_transport = local_transport
+        self.local_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.local_sock.setblocking(False)
+        self.local_sock.bind(("127.0.0.1", self.local_port))
 
-        # Remote socket (sends to server)
-        remote_transport, remote_proto = (
-            await loop.create_datagram_endpoint(
-                lambda: RemoteUDPProtocol(self),
-                remote_addr=self.remote_addr,
-            )
-        )
-        self.remote_transport = remote_transport
+        # Remote socket (sends to server). Connecting it means the kernel
+        # only delivers packets that come from remote_addr.
+        self.remote_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.remote_sock.setblocking(False)
+        self.remote_sock.connect(self.remote_addr)
+
+        for sock in (self.local_sock, self.remote_sock):
+            set_udp_buffers(sock)
+
+        # Until a browser has sent something, server packets have nowhere
+        # to go. _drain_local switches the remote side over to forwarding.
+        self._loop.add_reader(self.local_sock.fileno(), self._drain_local)
+        self._loop.add_reader(self.remote_sock.fileno(), self._discard_remote)
 
         print(
             f"[UDP] proxy localhost:{self.local_port} <-> "
             f"{self.remote_host}:{self.remote_port}"
         )
 
-        # Keep running indefinitely
-        await asyncio.sleep(float('inf'))
-
-
-class LocalUDPProtocol(asyncio.DatagramProtocol):
-    # Receives packets from browser on localhost, forwards to remote
-
-    def __init__(self, proxy):
-        self.proxy = proxy
-
-    def datagram_received(self, data, addr):
-        # Only forward packets from localhost
-        if addr[0] == "127.0.0.1":
-            self.proxy.remote_transport.sendto(data, self.proxy.remote_addr)
-
-
-class RemoteUDPProtocol(asyncio.DatagramProtocol):
-    # Receives packets from remote server, forwards to localhost
-
-    def __init__(self, proxy):
-        self.proxy = proxy
-
-    def datagram_received(self, data, addr):
-        # Only forward packets from the configured remote address
-        if addr == self.proxy.remote_addr:
-            self.proxy.local_transport.sendto(
-                data, ("127.0.0.1", self.proxy.local_port)
+        # Keep running until stop() is called
+        await self._stop.wait()
+
+    def stop(self):
+        # Release start() and close both sockets
+        self._stop.set()
+        for sock in (self.local_sock, self.remote_sock):
+            if sock is not None and sock.fileno() != -1:
+                self._loop.remove_reader(sock.fileno())
+                sock.close()
+
+    def _drain_local(self):
+        # Browser -> server. Errors (e.g. ICMP port unreachable reported
+        # on the connected remote socket) drop the packet, as asyncio's
+        # datagram transport would.
+        recvfrom_into = self.local_sock.recvfrom_into
+        send = self.remote_sock.send
+        buf = self._local_buf
+        addr = None
+        for _ in range(UDP_BATCH):
+            try:
+                n, addr = recvfrom_into(buf)
+            except BlockingIOError:
+                break
+            except OSError:
+                continue
+            try:
+                send(buf[:n])
+            except OSError:
+                pass
+        # Last sender in this batch becomes the return address
+        if addr is not None and addr != self._browser_addr:
+            self._set_browser(addr)
+
+    def _set_browser(self, addr):
+        # New (or first) browser port: send server packets there from now on
+        if self._browser_addr is None:
+            self._loop.remove_reader(self.remote_sock.fileno())
+            self._loop.add_reader(
+                self.remote_sock.fileno(), self._drain_remote
             )
+        self._browser_addr = addr
+
+    def _discard_remote(self):
+        recv_into = self.remote_sock.recv_into
+        buf = self._remote_buf
+        for _ in range(UDP_BATCH):
+            try:
+                recv_into(buf)
+            except BlockingIOError:
+                return
+            except OSError:
+                continue
+
+    def _drain_remote(self):
+        # Server -> browser
+        recv_into = self.remote_sock.recv_into
+        sendto = self.local_sock.sendto
+        dest = self._browser_addr
+        buf = self._remote_buf
+        for _ in range(UDP_BATCH):
+            try:
+                n = recv_into(buf)
+            except BlockingIOError:
+                return
+            except OSError:
+                continue
+            try:
+                sendto(buf[:n], dest)
+            except OSError:
+                pass
 
 
 # -------------------------
@@ -190,29 +406,43 @@ class RemoteUDPProtocol(asyncio.DatagramProtocol):
 # -------------------------
 
 async def main(server_hostname):
-    tasks = [
-        # TCP signaling (HTTP)
-        asyncio.create_task(
-            start_tcp_forward(HTTP_PORT, server_hostname, HTTP_PORT)
-        ),
+    # Resolve the server once up front. Otherwise every new TCP connection
+    # would repeat the (possibly mDNS) lookup, and UDP source addresses
+    # would never match a hostname.
+    loop = asyncio.get_running_loop()
+    addrinfo = await loop.getaddrinfo(
+        server_hostname, None, family=socket.AF_INET, type=socket.SOCK_STREAM
+    )
+    server_ip = addrinfo[0][4][0]
+    print(f"Resolved {server_hostname} -> {server_ip}")
 
+    proxies = [
         # UDP media (RTP/RTCP)
-        asyncio.create_task(
-            UDPProxy(RTP_PORT, server_hostname, RTP_PORT).start()
-        ),
+        UDPProxy(RTP_PORT, server_ip, RTP_PORT),
 
         # UDP data channel (inputs, control, etc.)
+        UDPProxy(DATA_PORT, server_ip, DATA_PORT),
+    ]
+
+    tasks = [
+        # TCP signaling (HTTP)
         asyncio.create_task(
-            UDPProxy(DATA_PORT, server_hostname, DATA_PORT).start()
+            start_tcp_forward(HTTP_PORT, server_ip, HTTP_PORT)
         ),
     ]
+    tasks += [asyncio.create_task(proxy.start()) for proxy in proxies]
 
     print("Tunnel active.")
     print(f"  HTTP  -> http://localhost:{HTTP_PORT}")
     print(f"  RTP   -> udp://localhost:{RTP_PORT}")
     print(f"  DATA  -> udp://localhost:{DATA_PORT}")
 
-    await asyncio.gather(*tasks)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # On Ctrl+C asyncio.run() cancels us; close the UDP sockets cleanly
+        for proxy in proxies:
+            proxy.stop()
 
 
 if __name__ == "__main__":
@@ -224,6 +454,21 @@ if __name__ == "__main__":
     server_hostname = sys.argv[1]
 
     try:
-        asyncio.run(main(server_hostname))
+        # Debug mode adds slow-path checks to every callback, so keep it off
+        # even if PYTHONASYNCIODEBUG is set in the environment
+        if uvloop is not None and sys.version_info >= (3, 12):
+            asyncio.run(
+                main(server_hostname),
+                loop_factory=uvloop.new_event_loop,
+                debug=False,
+            )
+        else:
+            if uvloop is not None:
+                # Older Pythons: asyncio.run() has no loop_factory
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            asyncio.run(main(server_hostname), debug=False)
+    except socket.gaierror as e:
+        print(f"Could not resolve {server_hostname}: {e}")
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\nShutting down.")